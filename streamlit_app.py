@@ -12,21 +12,28 @@ st.set_page_config(
 # -----------------------------------------------------------------------------
 # Declare some useful functions.
 
-@st.cache_data
+@st.cache_resource
 def get_gdp_data():
     """Grab GDP data from a CSV file.
 
-    This uses caching to avoid having to read the file every time. If we were
-    reading from an HTTP endpoint instead of a file, it's a good idea to set
-    a maximum age to the cache with the TTL argument: @st.cache_data(ttl='1d')
+    This uses caching to avoid having to read the file every time. We use
+    cache_resource rather than cache_data so each rerun gets the same
+    DataFrame back instead of unpickling a fresh copy, which means the result
+    must be treated as read-only. If we were reading from an HTTP endpoint
+    instead of a file, it's a good idea to set a maximum age to the cache with
+    the TTL argument: @st.cache_resource(ttl='1d')
     """
 
     # Instead of a CSV on disk, you could read from an HTTP endpoint here too.
     DATA_FILENAME = Path(__file__).parent/'data/gdp_data.csv'
-    raw_gdp_df = pd.read_csv(DATA_FILENAME)
 
     MIN_YEAR = 1960
     MAX_YEAR = 2022
+    YEAR_COLUMNS = [str(x) for x in range(MIN_YEAR, MAX_YEAR + 1)]
+
+    # Only parse the columns we actually use below. The file also has names,
+    # indicator metadata and a trailing empty column per row.
+    raw_gdp_df = pd.read_csv(DATA_FILENAME, usecols=['Country Code', *YEAR_COLUMNS])
 
     # The data above has columns like:
     # - Country Name
@@ -47,7 +54,7 @@ def get_gdp_data():
     # So let's pivot all those year-columns into two: Year and GDP
     gdp_df = raw_gdp_df.melt(
         ['Country Code'],
-        [str(x) for x in range(MIN_YEAR, MAX_YEAR + 1)],
+        YEAR_COLUMNS,
         'Year',
         'GDP',
     )
@@ -57,7 +64,38 @@ def get_gdp_data():
 
     return gdp_df
 
+@st.cache_resource
+def get_country_codes():
+    """List every country code once, in the order they appear in the CSV.
+
+    These are the multiselect options. They never change, so compute them once
+    instead of running unique() over the whole table on every rerun.
+    """
+    return get_gdp_data()['Country Code'].unique()
+
+@st.cache_resource
+def get_gdp_by_country_year():
+    """Index the GDP column by (Country Code, Year).
+
+    This lets the page look up a single country's GDP for a given year
+    directly, instead of filtering the whole table with a boolean mask.
+    """
+    return get_gdp_data().set_index(['Country Code', 'Year'])['GDP'].sort_index()
+
+def get_year_range(gdp_df, from_year, to_year):
+    """Return the rows of gdp_df with from_year <= Year <= to_year.
+
+    The melt in get_gdp_data stacks one year-column after another, so gdp_df
+    is sorted by Year and any range of years is a contiguous block of rows. That
+    lets us find it with two binary searches instead of comparing every row.
+    """
+    years = gdp_df['Year']
+    start = years.searchsorted(from_year, side='left')
+    end = years.searchsorted(to_year, side='right')
+    return gdp_df.iloc[start:end]
+
 gdp_df = get_gdp_data()
+gdp_by_country_year = get_gdp_by_country_year()
 
 # -----------------------------------------------------------------------------
 # Draw the actual page
@@ -84,7 +122,7 @@ from_year, to_year = st.slider(
     max_value=max_value,
     value=[min_value, max_value])
 
-countries = gdp_df['Country Code'].unique()
+countries = get_country_codes()
 
 if not len(countries):
     st.warning("Select at least one country")
@@ -99,18 +137,18 @@ selected_countries = st.multiselect(
 ''
 
 # Filter the data
-filtered_gdp_df = gdp_df[
-    (gdp_df['Country Code'].isin(selected_countries))
-    & (gdp_df['Year'] <= to_year)
-    & (from_year <= gdp_df['Year'])
-]
+year_range_df = get_year_range(gdp_df, from_year, to_year)
+filtered_gdp_df = year_range_df[year_range_df['Country Code'].isin(selected_countries)]
 
 st.header('GDP over time', divider='gray')
 
 ''
 
+# The chart only needs plotting precision, so send GDP as float32 and Year as
+# int16 to shrink the Arrow payload shipped to the browser on every rerun. The
+# metrics below keep reading full-precision values from gdp_by_country_year.
 st.line_chart(
-    filtered_gdp_df,
+    filtered_gdp_df.astype({'Year': 'int16', 'GDP': 'float32'}),
     x='Year',
     y='GDP',
     color='Country Code',
@@ -120,9 +158,6 @@ st.line_chart(
 ''
 
 
-first_year = gdp_df[gdp_df['Year'] == from_year]
-last_year = gdp_df[gdp_df['Year'] == to_year]
-
 st.header(f'GDP in {to_year}', divider='gray')
 
 ''
@@ -133,8 +168,8 @@ for i, country in enumerate(selected_countries):
     col = cols[i % len(cols)]
 
     with col:
-        first_gdp = first_year[first_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
-        last_gdp = last_year[last_year['Country Code'] == country]['GDP'].iat[0] / 1000000000
+        first_gdp = gdp_by_country_year.loc[(country, from_year)] / 1000000000
+        last_gdp = gdp_by_country_year.loc[(country, to_year)] / 1000000000
 
         if math.isnan(first_gdp):
             growth = 'n/a'